@@ -7,24 +7,34 @@ Tractive API client, and displays available data (trackers, hardware info,
 position data, geofences, live mode state).
 """
 
+import asyncio
 import logging
 import os
+import re
 import secrets
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 
 from fastapi import FastAPI, Request, Response, Form, Depends, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
-from .tractive_client import TractiveClient, TractiveClientError
+from . import storage
+from .tractive_client import TractiveAuthError, TractiveClient, TractiveClientError, forget_persisted_trackers
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_urlsafe(32))
 PORT = int(os.getenv("PORT", 8080))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Server-side store for Tractive access tokens, keyed by session id
+SESSION_DIR = Path(os.getenv("SESSION_DIR", Path.home() / ".cache" / "tractive_viewer" / "sessions"))
+SESSION_MAX_AGE = 1200  # 20 minutes
+# How often stored tokens are pruned, and how often an active session refreshes its token's mtime
+SESSION_PRUNE_INTERVAL = 300
 
 # Setup logging
 logging.basicConfig(
@@ -41,7 +51,7 @@ app = FastAPI(
 )
 
 # Add session middleware
-app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY, max_age=1200)  # 20 minutes
+app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY, max_age=SESSION_MAX_AGE)
 
 # Mount static files and templates
 try:
@@ -54,6 +64,11 @@ templates = Jinja2Templates(directory="app/templates")
 
 # Global client instance (in production, you'd use dependency injection)
 tractive_clients: Dict[str, TractiveClient] = {}
+# Serializes client creation per session so concurrent first requests share one restore
+session_locks: Dict[str, asyncio.Lock] = {}
+# When each session's stored token was last marked as in use
+session_tokens_seen: Dict[str, float] = {}
+session_prune_task: Optional[asyncio.Task] = None
 
 
 def get_session_id(request: Request) -> str:
@@ -78,14 +93,149 @@ async def require_auth(request: Request) -> Dict[str, Any]:
     return user
 
 
+def session_token_path(session_id: str) -> Optional[Path]:
+    """Path of the stored access token for a session, None for unusable ids"""
+    if not re.fullmatch(r'[\w-]+', session_id):
+        return None
+    return SESSION_DIR / f"{session_id}.json"
+
+
+async def load_session_token(session_id: str) -> Optional[Dict[str, Any]]:
+    """Load the access token stored for a session"""
+    path = session_token_path(session_id)
+    if path is None:
+        return None
+    record = await asyncio.to_thread(storage.read_json, path)
+    return record if isinstance(record, dict) else None
+
+
+async def save_session_token(session_id: str, record: Dict[str, Any]):
+    """Store a session's access token on the server (never in the cookie)"""
+    path = session_token_path(session_id)
+    if path is None:
+        return
+    try:
+        await asyncio.to_thread(storage.write_private_json, path, record)
+        session_tokens_seen[session_id] = time.time()
+    except Exception as e:
+        logger.warning(f"Failed to store session token: {str(e)}")
+
+
+async def touch_session_token(session_id: str):
+    """Mark a session's stored access token as in use, at most once per SESSION_PRUNE_INTERVAL"""
+    now = time.time()
+    if now - session_tokens_seen.get(session_id, 0) < SESSION_PRUNE_INTERVAL:
+        return
+    session_tokens_seen[session_id] = now
+    path = session_token_path(session_id)
+    if path is not None:
+        await asyncio.to_thread(storage.touch_file, path)
+
+
+async def delete_session_token(session_id: str):
+    """Remove the access token stored for a session"""
+    path = session_token_path(session_id)
+    if path is not None:
+        await asyncio.to_thread(storage.remove_file, path)
+
+
+def prune_session_tokens() -> List[str]:
+    """
+    Remove stored access tokens that are unreadable, expired or unused
+    
+    A token counts as unused once its session cookie has expired. Active
+    sessions refresh the token's mtime only every SESSION_PRUNE_INTERVAL, so
+    that interval is added to the cookie's max_age. Returns the ids of the
+    sessions whose token was removed.
+    """
+    if not SESSION_DIR.is_dir():
+        return []
+    
+    now = time.time()
+    unused_before = now - SESSION_MAX_AGE - SESSION_PRUNE_INTERVAL
+    pruned = []
+    for path in SESSION_DIR.glob("*.json"):
+        try:
+            unused = path.stat().st_mtime < unused_before
+        except FileNotFoundError:
+            continue
+        if not unused:
+            record = storage.read_json(path)
+            unused = not isinstance(record, dict) or (record.get("expires_at") or 0) < now
+        if unused:
+            storage.remove_file(path)
+            pruned.append(path.stem)
+    return pruned
+
+
+async def prune_session_tokens_periodically():
+    """Prune stored tokens every SESSION_PRUNE_INTERVAL and close the clients of pruned sessions"""
+    while True:
+        try:
+            for session_id in await asyncio.to_thread(prune_session_tokens):
+                session_locks.pop(session_id, None)
+                session_tokens_seen.pop(session_id, None)
+                client = tractive_clients.pop(session_id, None)
+                if client:
+                    await client.close()
+        except Exception as e:
+            logger.error(f"Failed to prune session tokens: {str(e)}")
+        await asyncio.sleep(SESSION_PRUNE_INTERVAL)
+
+
 async def get_tractive_client(request: Request) -> TractiveClient:
     """Get or create Tractive client for current session"""
     session_id = get_session_id(request)
     
-    if session_id not in tractive_clients:
-        tractive_clients[session_id] = TractiveClient()
+    client = tractive_clients.get(session_id)
+    if client is not None:
+        if request.session.get("user"):
+            await touch_session_token(session_id)
+        return client
+    
+    async with session_locks.setdefault(session_id, asyncio.Lock()):
+        # Another request may have created the client while we waited
+        client = tractive_clients.get(session_id)
+        if client is not None:
+            return client
+        
+        client = TractiveClient()
+        
+        # Reuse the stored access token (e.g. after a server restart) instead of logging in again
+        user = request.session.get("user")
+        if user:
+            record = await load_session_token(session_id)
+            try:
+                if not record or record.get("user_id") != user.get("user_id"):
+                    raise TractiveAuthError("No stored access token")
+                await client.restore_session(record)
+                await touch_session_token(session_id)
+            except TractiveClientError as e:
+                logger.info(f"Session could not be restored: {str(e)}")
+                await delete_session_token(session_id)
+                request.session.pop("user", None)
+                raise HTTPException(status_code=401, detail="Session expired")
+        
+        tractive_clients[session_id] = client
+    
+    return client
+
+
+async def end_tractive_session(request: Request):
+    """Close and drop the session's Tractive client, forget its token and log the user out"""
+    session_id = get_session_id(request)
+    
+    session_locks.pop(session_id, None)
+    session_tokens_seen.pop(session_id, None)
+    client = tractive_clients.pop(session_id, None)
+    if client:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.error(f"Error closing client: {str(e)}")
     
-    return tractive_clients[session_id]
+    await delete_session_token(session_id)
+    request.session.pop("user", None)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -119,12 +269,22 @@ async def login(
 ):
     """Handle login form submission"""
     try:
+        # A new login replaces whatever client and token the session had
+        await end_tractive_session(request)
         client = await get_tractive_client(request)
         
         # Authenticate with Tractive
         session_data = await client.authenticate(email, password)
         
-        # Store minimal session data (never store password)
+        # The access token stays on the server; the cookie is signed but not encrypted
+        await save_session_token(get_session_id(request), {
+            "email": email,
+            "user_id": session_data.get("user_id"),
+            "access_token": session_data.get("access_token"),
+            "expires_at": session_data.get("expires_at")
+        })
+        
+        # Store minimal session data (never store password or token)
         request.session["user"] = {
             "email": email,
             "user_id": session_data.get("user_id"),
@@ -154,16 +314,13 @@ async def login(
 @app.post("/logout")
 async def logout(request: Request):
     """Handle logout"""
-    session_id = get_session_id(request)
+    user = request.session.get("user") or {}
     
     # Clean up client
-    if session_id in tractive_clients:
-        try:
-            await tractive_clients[session_id].close()
-        except Exception as e:
-            logger.error(f"Error closing client during logout: {str(e)}")
-        finally:
-            del tractive_clients[session_id]
+    await end_tractive_session(request)
+    
+    # Don't leave the user's trackers on disk after they log out
+    await forget_persisted_trackers(user.get("user_id"))
     
     # Clear session
     request.session.clear()
@@ -185,6 +342,8 @@ async def dashboard(request: Request, tracker_id: Optional[str] = None):
         # Get trackers list
         try:
             trackers = await client.get_trackers()
+        except TractiveAuthError:
+            raise
         except TractiveClientError as e:
             logger.error(f"Failed to get trackers: {str(e)}")
             trackers = []
@@ -222,26 +381,36 @@ async def dashboard(request: Request, tracker_id: Optional[str] = None):
         # Fetch all data concurrently (in a real app, you'd use asyncio.gather)
         try:
             dashboard_data["hardware_info"] = await client.get_hardware_info(tracker_id)
+        except TractiveAuthError:
+            raise
         except Exception as e:
             dashboard_data["errors"].append(f"Hardware info: {str(e)}")
         
         try:
             dashboard_data["latest_position"] = await client.get_latest_position(tracker_id)
+        except TractiveAuthError:
+            raise
         except Exception as e:
             dashboard_data["errors"].append(f"Latest position: {str(e)}")
         
         try:
             dashboard_data["recent_history"] = await client.get_position_history(tracker_id, hours=2)
+        except TractiveAuthError:
+            raise
         except Exception as e:
             dashboard_data["errors"].append(f"Position history: {str(e)}")
         
         try:
             dashboard_data["geofences"] = await client.get_geofences(tracker_id)
+        except TractiveAuthError:
+            raise
         except Exception as e:
             dashboard_data["errors"].append(f"Geofences: {str(e)}")
         
         try:
             dashboard_data["live_tracking"] = await client.get_live_tracking_state(tracker_id)
+        except TractiveAuthError:
+            raise
         except Exception as e:
             dashboard_data["errors"].append(f"Live tracking: {str(e)}")
         
@@ -252,6 +421,11 @@ async def dashboard(request: Request, tracker_id: Optional[str] = None):
         
     except HTTPException:
         return RedirectResponse(url="/login", status_code=302)
+    except TractiveAuthError as e:
+        # Token expired or revoked; without the password the only fallback is a new login
+        logger.warning(f"Tractive session no longer valid: {str(e)}")
+        await end_tractive_session(request)
+        return RedirectResponse(url="/login", status_code=302)
     except Exception as e:
         logger.error(f"Dashboard error: {str(e)}")
         return templates.TemplateResponse("dashboard.html", {
@@ -264,9 +438,10 @@ async def dashboard(request: Request, tracker_id: Optional[str] = None):
 async def get_json_data(
     request: Request,
     kind: str,
-    tracker_id: Optional[str] = None
+    tracker_id: Optional[str] = None,
+    refresh: bool = False
 ):
-    """Return raw JSON data for inspection"""
+    """Return raw JSON data for inspection (serialized with orjson)"""
     try:
         user = await require_auth(request)
         client = await get_tractive_client(request)
@@ -274,26 +449,38 @@ async def get_json_data(
         if kind == "trackers":
             data = await client.get_trackers()
         elif kind == "hw_info" and tracker_id:
-            data = await client.get_hardware_info(tracker_id)
+            data = await client.get_hardware_info(tracker_id, force_refresh=refresh)
         elif kind == "latest" and tracker_id:
             data = await client.get_latest_position(tracker_id)
+        elif kind == "latest_all":
+            trackers = await client.get_trackers()
+            data = await client.get_latest_positions([t["id"] for t in trackers])
         elif kind == "history" and tracker_id:
             data = await client.get_position_history(tracker_id, hours=2)
+        elif kind == "history_columnar" and tracker_id:
+            data = await client.get_position_history_columnar(tracker_id, hours=2)
         elif kind == "geofences" and tracker_id:
             data = await client.get_geofences(tracker_id)
         else:
             raise HTTPException(status_code=400, detail="Invalid data kind or missing tracker_id")
         
-        return JSONResponse(content=data)
+        return ORJSONResponse(content=data)
         
     except HTTPException:
-        return JSONResponse(
+        return ORJSONResponse(
+            content={"error": "Authentication required"},
+            status_code=401
+        )
+    except TractiveAuthError as e:
+        logger.warning(f"Tractive session no longer valid: {str(e)}")
+        await end_tractive_session(request)
+        return ORJSONResponse(
             content={"error": "Authentication required"},
             status_code=401
         )
     except Exception as e:
         logger.error(f"Error fetching {kind} data: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             content={"error": str(e)},
             status_code=500
         )
@@ -320,6 +507,10 @@ async def toggle_live_tracking(
         
     except HTTPException:
         return RedirectResponse(url="/login", status_code=302)
+    except TractiveAuthError as e:
+        logger.warning(f"Tractive session no longer valid: {str(e)}")
+        await end_tractive_session(request)
+        return RedirectResponse(url="/login", status_code=302)
     except Exception as e:
         logger.error(f"Error toggling live tracking: {str(e)}")
         return RedirectResponse(
@@ -338,10 +529,20 @@ async def health_check():
     })
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start pruning stored access tokens of expired or unused sessions"""
+    global session_prune_task
+    session_prune_task = asyncio.create_task(prune_session_tokens_periodically())
+
+
 # Cleanup on shutdown
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown"""
+    if session_prune_task:
+        session_prune_task.cancel()
+    
     for client in tractive_clients.values():
         try:
             await client.close()
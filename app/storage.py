@@ -0,0 +1,66 @@
+"""
+Private On-Disk JSON Storage
+
+Small helpers for the JSON files the app keeps on the server (session tokens,
+persisted trackers). Files are readable by the app's user only and written
+atomically, so concurrent workers never see a partial file.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def read_json(path: Path) -> Optional[Any]:
+    """Read a JSON file, returning None if it is missing or unreadable"""
+    try:
+        with path.open('r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Failed to read %s: %s", path, e)
+        return None
+
+
+def write_private_json(path: Path, data: Any):
+    """Atomically write data as JSON to a file only the current user can access"""
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    # mkstemp creates a uniquely named file with 0600 permissions
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def remove_file(path: Path):
+    """Delete a file if it exists"""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Failed to remove %s: %s", path, e)
+
+
+def touch_file(path: Path):
+    """Set a file's modification time to now if it exists"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Failed to touch %s: %s", path, e)
@@ -2,20 +2,45 @@
 Tractive API Client Wrapper
 
 A thin wrapper around aiotractive for authentication and data retrieval.
+
+All methods return plain dicts and lists of JSON-compatible values; the web
+layer serializes them with orjson (see ORJSONResponse in main.py).
+
+The client only uses standard asyncio APIs and works on uvloop, which uvicorn
+selects automatically when installed (uvicorn[standard] includes it).
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import chain, islice
+from operator import itemgetter
+from pathlib import Path
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 try:
     from aiotractive import Tractive
+    from aiotractive.exceptions import UnauthorizedError
 except ImportError:
     # Fallback for development/testing
+    class UnauthorizedError(Exception):
+        pass
+    
     class Tractive:
-        def __init__(self, email: str, password: str):
+        def __init__(self, email: str, password: str, session=None):
             self.email = email
             self.password = password
+            self.session = session
         
         async def __aenter__(self):
             return self
@@ -30,22 +55,354 @@ except ImportError:
                 'access_token': 'test_access_token'
             }
 
+from . import storage
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent per-tracker API requests
+_MAX_CONCURRENT_REQUESTS = 8
+
+# Connection pool settings for the shared HTTP session; all API calls go to a
+# single host, so the per-host limit leaves room for batch fan-out on top of
+# the concurrent dashboard requests
+_HTTP_POOL_LIMIT = 64
+_HTTP_POOL_LIMIT_PER_HOST = 16
+_HTTP_KEEPALIVE_TIMEOUT = 75
+_HTTP_DNS_CACHE_TTL = 300
+
+# aiotractive discards credentials this many seconds before they expire and
+# logs in again, which a restored session cannot do without the password
+_TOKEN_EXPIRY_MARGIN = 3600
+
+# Maximum number of points returned by get_position_history
+_MAX_HISTORY_POINTS = 100
+
+# Output fields of a formatted position point
+_POSITION_FIELDS = (
+    'timestamp', 'latitude', 'longitude', 'speed',
+    'accuracy', 'altitude', 'course', 'sensor_used'
+)
+
+# Fetches all raw fields of a complete position point in one call
+_get_position_fields = itemgetter(
+    'time', 'latlong', 'speed', 'pos_uncertainty', 'alt', 'course', 'sensor_used'
+)
+
+# Seconds a fetched trackers list is served from memory
+_TRACKERS_TTL = 30.0
+
+# Seconds a per-tracker hardware info result is served from memory
+_HW_INFO_TTL = 15.0
+
+# Directory where the last trackers list of each user is persisted, and the
+# maximum age (seconds) of a persisted list that is still served on startup
+_DISK_CACHE_DIR = Path(os.getenv("TRACTIVE_CACHE_DIR", Path.home() / ".cache" / "tractive_viewer"))
+_DISK_CACHE_MAX_AGE = 300.0
+
+# Maximum number of trackers whose hardware info is kept in memory
+_HW_CACHE_MAXSIZE = 128
+
+
+async def _bounded(semaphore: asyncio.Semaphore, fetch: Callable[[], Awaitable[Any]]):
+    """Call and await fetch while holding the semaphore
+    
+    The coroutine is only created once the semaphore is acquired, so a call
+    cancelled while waiting leaves no coroutine that was never awaited.
+    """
+    async with semaphore:
+        return await fetch()
+
+
+async def _capture_exception(fetch: Callable[[], Awaitable[Any]]):
+    """Call and await fetch, returning its exception instead of raising it"""
+    try:
+        return await fetch()
+    except Exception as e:
+        return e
+
+
+async def _fetch_details_and_hw_info(tracker_objects: List[Any]) -> Tuple[List[Dict], List[Any]]:
+    """
+    Fetch details and hw_info for all trackers concurrently
+    
+    A failed details() call cancels all other requests and is raised; a failed
+    hw_info() call is returned in place of its report so the caller can fall
+    back to the battery fields from details.
+    """
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+    try:
+        async with asyncio.TaskGroup() as tg:
+            details_tasks = [tg.create_task(_bounded(semaphore, t.details)) for t in tracker_objects]
+            hw_info_tasks = [
+                tg.create_task(_bounded(semaphore, partial(_capture_exception, t.hw_info)))
+                for t in tracker_objects
+            ]
+    except ExceptionGroup as eg:
+        # Surface the first failure the way a plain await would
+        raise eg.exceptions[0]
+    
+    return [t.result() for t in details_tasks], [t.result() for t in hw_info_tasks]
+
+
+def _batch_results(tracker_ids: List[str], results: List[Any]) -> Dict[str, Any]:
+    """Map gathered per-tracker results to tracker ids, turning failures into error dicts
+    
+    Authentication failures are raised instead, since they affect every tracker.
+    """
+    for result in results:
+        if isinstance(result, TractiveAuthError):
+            raise result
+    
+    # BaseException: gather also returns CancelledError for a cancelled child
+    return {
+        tracker_id: {'error': str(result) or type(result).__name__} if isinstance(result, BaseException) else result
+        for tracker_id, result in zip(tracker_ids, results)
+    }
+
+
+def _create_http_session() -> Optional["aiohttp.ClientSession"]:
+    """Create the pooled HTTP session shared by all API calls of one client"""
+    if aiohttp is None:
+        return None
+    
+    connector = aiohttp.TCPConnector(
+        limit=_HTTP_POOL_LIMIT,
+        limit_per_host=_HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=_HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=_HTTP_DNS_CACHE_TTL,
+        enable_cleanup_closed=True
+    )
+    # aiotractive relies on raise_for_status to map HTTP errors to its own exceptions
+    return aiohttp.ClientSession(connector=connector, raise_for_status=True)
+
+
+def _install_credentials(client: Tractive, credentials: Dict[str, Any]):
+    """Seed aiotractive's auth state so requests reuse the token instead of logging in"""
+    api = getattr(client, '_api', None)
+    if api is None:
+        # Development fallback client has no API state
+        return
+    
+    api._user_credentials = credentials
+    api._auth_headers = {
+        'x-tractive-user': credentials['user_id'],
+        'authorization': f"Bearer {credentials['access_token']}"
+    }
+
+
+def _merge_hw_info(tracker_details: Dict[str, Any], hw_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlay live battery/charging fields from a hw_info report onto tracker details"""
+    merged = dict(tracker_details)
+    if 'battery_level' in hw_info:
+        merged['battery_level'] = hw_info['battery_level']
+    if 'battery_state' in hw_info:
+        merged['charging'] = hw_info['battery_state'] == 'CHARGING'
+    return merged
+
+
+def _disk_cache_path(user_id: Optional[str]) -> Optional[Path]:
+    """Path of the persisted trackers file for a user, None for unusable ids"""
+    if not user_id or not re.fullmatch(r'[\w-]+', user_id):
+        return None
+    return _DISK_CACHE_DIR / f"{user_id}.json"
+
+
+def _load_persisted_trackers(user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Load the trackers persisted for a user if present and recent enough"""
+    path = _disk_cache_path(user_id)
+    if path is None:
+        return None
+    
+    try:
+        if time.time() - path.stat().st_mtime > _DISK_CACHE_MAX_AGE:
+            return None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Failed to load persisted trackers from %s: %s", path, e)
+        return None
+    
+    persisted = storage.read_json(path)
+    if persisted is None:
+        return None
+    if not _valid_persisted_trackers(persisted):
+        logger.warning("Ignoring malformed persisted trackers in %s", path)
+        return None
+    return persisted
+
+
+def _valid_persisted_trackers(persisted: Any) -> bool:
+    """Whether loaded data has the shape written by _persist_trackers"""
+    if not isinstance(persisted, dict):
+        return False
+    trackers, formatted = persisted.get('trackers'), persisted.get('formatted')
+    return (
+        isinstance(trackers, list) and isinstance(formatted, list)
+        and all(isinstance(t, dict) for t in trackers)
+        and all(isinstance(t, dict) for t in formatted)
+    )
+
+
+def _persist_trackers(user_id: Optional[str], trackers: List[Dict], formatted_trackers: List[Dict]):
+    """Atomically write the raw and formatted trackers of a user to a private file"""
+    path = _disk_cache_path(user_id)
+    if path is None:
+        return
+    
+    try:
+        storage.write_private_json(path, {'trackers': trackers, 'formatted': formatted_trackers})
+    except Exception as e:
+        logger.warning("Failed to persist trackers to %s: %s", path, e)
+
+
+async def forget_persisted_trackers(user_id: Optional[str]):
+    """Remove the trackers persisted for a user (e.g. on logout)"""
+    path = _disk_cache_path(user_id)
+    if path is not None:
+        await asyncio.to_thread(storage.remove_file, path)
+
+
+def _format_tracker(tracker: Dict[str, Any]) -> Dict[str, Any]:
+    """Format tracker details for display"""
+    g = tracker.get
+    return {
+        'id': g('_id', 'Unknown'),
+        'name': g('name', 'Unnamed'),
+        'pet_name': g('pet_name', 'Unknown Pet'),
+        'model': g('model_number', 'Unknown Model'),
+        'firmware': g('fw_version', 'Unknown'),
+        'battery': g('battery_level', 0),
+        'charging': g('charging', False),
+        'last_seen': g('time_of_last_position_update', 'Unknown')
+    }
+
+
+def _format_hardware_info(tracker_id: str, tracker: Dict[str, Any]) -> Dict[str, Any]:
+    """Format tracker details as hardware information"""
+    g = tracker.get
+    return {
+        'tracker_id': tracker_id,
+        'battery_level': g('battery_level', 0),
+        'firmware_version': g('fw_version', 'Unknown'),
+        'model': g('model_number', 'Unknown'),
+        'capabilities': g('capabilities', []),
+        'hardware_id': g('hw_id', 'Unknown'),
+        'charging': g('charging', False)
+    }
+
+
+def _position_row(pos: Dict[str, Any]) -> Tuple:
+    """Extract the _POSITION_FIELDS values of a single position point"""
+    try:
+        timestamp, latlong, speed, accuracy, altitude, course, sensor_used = _get_position_fields(pos)
+    except KeyError:
+        # Slow path for points missing some fields
+        g = pos.get
+        timestamp, latlong, speed, accuracy = g('time', 'Unknown'), g('latlong'), g('speed', 0), g('pos_uncertainty', 0)
+        altitude, course, sensor_used = g('alt'), g('course'), g('sensor_used')
+    
+    if not latlong:
+        latlong = (None, None)
+    return (timestamp, latlong[0], latlong[1], speed, accuracy, altitude, course, sensor_used)
+
+
+def _format_position(pos: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a single position point from a positions response"""
+    timestamp, latitude, longitude, speed, accuracy, altitude, course, sensor_used = _position_row(pos)
+    return {
+        'timestamp': timestamp,
+        'latitude': latitude,
+        'longitude': longitude,
+        'speed': speed,
+        'accuracy': accuracy,
+        'altitude': altitude,
+        'course': course,
+        'sensor_used': sensor_used
+    }
+
+
+def _convert_points(convert: Callable[[Dict[str, Any]], Any], points: Iterable[Any]) -> List[Any]:
+    """Apply convert to each point, skipping points that are not well-formed"""
+    converted = []
+    append = converted.append
+    for pos in points:
+        try:
+            append(convert(pos))
+        except (AttributeError, IndexError, KeyError, TypeError) as e:
+            logger.debug("Skipping malformed position point: %s", e)
+    return converted
+
+
+def _position_columns(points: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Collect position points into one list per field"""
+    rows = _convert_points(_position_row, points)
+    if not rows:
+        return {field: [] for field in _POSITION_FIELDS}
+    return {field: list(column) for field, column in zip(_POSITION_FIELDS, zip(*rows))}
+
+
+class _LRUCache(OrderedDict):
+    """OrderedDict that evicts the least recently used entry beyond maxsize"""
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
 
 class TractiveClientError(Exception):
     """Custom exception for Tractive client errors"""
     pass
 
 
+class TractiveAuthError(TractiveClientError):
+    """Raised when the client's credentials are missing, expired or rejected"""
+    pass
+
+
+def _client_error(message: str, error: BaseException) -> TractiveClientError:
+    """Wrap an error for callers, keeping authentication failures distinguishable"""
+    if isinstance(error, TractiveAuthError):
+        return TractiveAuthError(f"{message}: {str(error)}")
+    if isinstance(error, UnauthorizedError):
+        return TractiveAuthError(f"{message}: access token rejected")
+    return TractiveClientError(f"{message}: {str(error)}")
+
+
 class TractiveClient:
     """Thin wrapper around aiotractive for session management and data fetching"""
     
+    __slots__ = (
+        '_client', '_http', '_user_id', '_access_token', '_token_expires_at',
+        '_trackers', '_trackers_cache', '_trackers_by_id', '_hw_cache',
+        '_inflight', '_persisted_trackers', '_refresh_task'
+    )
+    
     def __init__(self):
         self._client: Optional[Tractive] = None
+        self._http: Optional["aiohttp.ClientSession"] = None
         self._user_id: Optional[str] = None
         self._access_token: Optional[str] = None
+        # Only set for restored sessions, which cannot renew their token
+        self._token_expires_at: Optional[float] = None
         self._trackers: Optional[List[Dict]] = None
+        self._trackers_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+        self._trackers_by_id: Dict[str, Dict] = {}
+        self._hw_cache: Dict[str, Tuple[float, Dict[str, Any]]] = _LRUCache(_HW_CACHE_MAXSIZE)
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self._persisted_trackers: Optional[Dict[str, Any]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
         
     async def authenticate(self, email: str, password: str) -> Dict[str, Any]:
         """
@@ -55,7 +412,11 @@ class TractiveClient:
             Dict with user_id and access_token for session storage
         """
         try:
-            self._client = Tractive(email, password)
+            # Drop any previous login so its HTTP session and caches are released
+            await self.close()
+            
+            self._http = _create_http_session()
+            self._client = Tractive(email, password, session=self._http)
             await self._client.__aenter__()
             
             # Authenticate and get user credentials
@@ -63,102 +424,232 @@ class TractiveClient:
             self._user_id = credentials.get('user_id')
             self._access_token = credentials.get('access_token')
             
-            logger.info(f"Successfully authenticated user: {email}")
+            self._persisted_trackers = await asyncio.to_thread(_load_persisted_trackers, self._user_id)
+            
+            logger.info("Successfully authenticated user: %s", email)
             
             return {
                 'user_id': self._user_id,
                 'access_token': self._access_token,
+                'expires_at': credentials.get('expires_at'),
                 'email': email,
                 'authenticated_at': datetime.now().isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Authentication failed for {email}: {str(e)}")
+            logger.error("Authentication failed for %s: %s", email, e)
+            await self.close()
             raise TractiveClientError(f"Authentication failed: {str(e)}")
     
     async def restore_session(self, session_data: Dict[str, Any]):
-        """Restore client session from stored session data"""
+        """Restore client session from stored session data, reusing the access token"""
         try:
-            # For now, we'll need to re-authenticate
-            # In a production app, you'd want to store and reuse the access token
             email = session_data.get('email')
             if not email:
                 raise TractiveClientError("No email in session data")
-                
-            # Note: This is a limitation of the current approach
-            # In production, you'd want to store refresh tokens
-            logger.info(f"Session restoration attempted for {email}")
+            
+            user_id = session_data.get('user_id')
+            access_token = session_data.get('access_token')
+            expires_at = session_data.get('expires_at')
+            if not (user_id and access_token and expires_at):
+                raise TractiveClientError("No access token in session data")
+            
+            if expires_at - time.time() < _TOKEN_EXPIRY_MARGIN:
+                raise TractiveClientError("Access token expired")
+            
+            await self.close()
+            
+            # No password: aiotractive only needs it to fetch a new token
+            self._http = _create_http_session()
+            self._client = Tractive(email, None, session=self._http)
+            await self._client.__aenter__()
+            _install_credentials(self._client, {
+                'user_id': user_id,
+                'access_token': access_token,
+                'expires_at': expires_at
+            })
+            self._user_id = user_id
+            self._access_token = access_token
+            self._token_expires_at = expires_at
+            
+            self._persisted_trackers = await asyncio.to_thread(_load_persisted_trackers, self._user_id)
+            
+            logger.info("Session restored for %s", email)
             
         except Exception as e:
-            logger.error(f"Session restoration failed: {str(e)}")
-            raise TractiveClientError(f"Session restoration failed: {str(e)}")
+            logger.error("Session restoration failed: %s", e)
+            await self.close()
+            raise TractiveAuthError(f"Session restoration failed: {str(e)}")
     
-    async def get_trackers(self) -> List[Dict[str, Any]]:
-        """Get list of user's trackers"""
+    def _ensure_authenticated(self):
+        """Raise TractiveAuthError unless the client can make authenticated calls"""
         if not self._client:
-            raise TractiveClientError("Not authenticated")
-            
+            raise TractiveAuthError("Not authenticated")
+        
+        # aiotractive would try to log in again without a password
+        if self._token_expires_at is not None and self._token_expires_at - time.time() < _TOKEN_EXPIRY_MARGIN:
+            raise TractiveAuthError("Access token expired")
+    
+    async def _single_flight(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fetch once for concurrent callers with the same key and share its result
+        
+        The fetch runs in its own task which every caller awaits through
+        asyncio.shield, so a cancelled caller never cancels the shared fetch.
+        Only close() cancels it, which callers see as TractiveAuthError.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._single_flight_done, key))
+        
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                raise TractiveAuthError("Client closed")
+            raise
+    
+    def _single_flight_done(self, key: Tuple, task: asyncio.Task):
+        """Forget a finished shared fetch"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    def _trackers_cache_fresh(self) -> bool:
+        """Whether the cached trackers list is younger than _TRACKERS_TTL"""
+        return bool(self._trackers_cache) and time.monotonic() - self._trackers_cache[0] < _TRACKERS_TTL
+    
+    def invalidate_trackers(self):
+        """Drop the cached trackers list so the next get_trackers call refetches it"""
+        self._trackers_cache = None
+    
+    async def get_trackers(self) -> List[Dict[str, Any]]:
+        """Get list of user's trackers, cached for _TRACKERS_TTL seconds"""
+        self._ensure_authenticated()
+        
+        if self._trackers_cache_fresh():
+            return self._trackers_cache[1]
+        
+        if self._persisted_trackers:
+            # Serve the list persisted by a previous process and revalidate in the background
+            persisted, self._persisted_trackers = self._persisted_trackers, None
+            self._trackers = persisted['trackers']
+            self._trackers_by_id = {t.get('_id'): t for t in self._trackers}
+            self._refresh_task = asyncio.create_task(self._refresh_trackers())
+            return persisted['formatted']
+        
+        return await self._single_flight(('trackers',), self._fetch_trackers)
+    
+    async def _refresh_trackers(self):
+        """Refetch trackers in the background, logging instead of raising on failure"""
+        try:
+            await self.get_trackers()
+        except TractiveClientError as e:
+            logger.warning("Background trackers refresh failed: %s", e)
+    
+    async def _fetch_trackers(self) -> List[Dict[str, Any]]:
+        """Fetch and format all trackers, refreshing the trackers cache"""
+        client = self._client
         try:
-            tracker_objects = await self._client.trackers()
+            tracker_objects = await client.trackers()
+            
+            details, hw_infos = await _fetch_details_and_hw_info(tracker_objects)
             
-            # Get details for each tracker
+            # Merge hw_info and format for display in a single pass
             trackers = []
-            for tracker_obj in tracker_objects:
-                tracker_details = await tracker_obj.details()
+            formatted_trackers = []
+            for tracker_details, hw_info in zip(details, hw_infos):
+                if isinstance(hw_info, Exception):
+                    logger.warning("Failed to get hw_info for %s: %s", tracker_details.get('_id'), hw_info)
+                elif hw_info:
+                    tracker_details = _merge_hw_info(tracker_details, hw_info)
                 trackers.append(tracker_details)
+                
+                formatted_trackers.append(_format_tracker(tracker_details))
             
-            self._trackers = trackers
+            # Don't write results of a login that was closed or replaced meanwhile
+            if self._client is not client:
+                raise TractiveAuthError("Client closed")
             
-            # Format tracker data for display
-            formatted_trackers = []
-            for tracker in trackers:
-                formatted_trackers.append({
-                    'id': tracker.get('_id', 'Unknown'),
-                    'name': tracker.get('name', 'Unnamed'),
-                    'pet_name': tracker.get('pet_name', 'Unknown Pet'),
-                    'model': tracker.get('model_number', 'Unknown Model'),
-                    'firmware': tracker.get('fw_version', 'Unknown'),
-                    'battery': tracker.get('battery_level', 0),
-                    'charging': tracker.get('charging', False),
-                    'last_seen': tracker.get('time_of_last_position_update', 'Unknown')
-                })
+            self._trackers = trackers
+            self._trackers_by_id = {t.get('_id'): t for t in trackers}
+            self._trackers_cache = (time.monotonic(), formatted_trackers)
+            await asyncio.to_thread(_persist_trackers, self._user_id, trackers, formatted_trackers)
             
             return formatted_trackers
             
         except Exception as e:
-            logger.error(f"Failed to get trackers: {str(e)}")
-            raise TractiveClientError(f"Failed to get trackers: {str(e)}")
+            logger.error("Failed to get trackers: %s", e)
+            raise _client_error("Failed to get trackers", e)
     
-    async def get_hardware_info(self, tracker_id: str) -> Dict[str, Any]:
-        """Get hardware information for a specific tracker"""
-        if not self._client:
-            raise TractiveClientError("Not authenticated")
+    async def get_hardware_info(self, tracker_id: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get hardware information for a specific tracker
+        
+        Served from the hw_info already fetched by get_trackers while the trackers
+        cache is fresh, otherwise from a live hw_info report cached for
+        _HW_INFO_TTL seconds. force_refresh always fetches a live report.
+        """
+        self._ensure_authenticated()
             
         try:
             # Get tracker details
-            tracker = next((t for t in (self._trackers or []) if t.get('_id') == tracker_id), None)
+            tracker = self._trackers_by_id.get(tracker_id)
             if not tracker:
                 raise TractiveClientError(f"Tracker {tracker_id} not found")
             
-            return {
-                'tracker_id': tracker_id,
-                'battery_level': tracker.get('battery_level', 0),
-                'firmware_version': tracker.get('fw_version', 'Unknown'),
-                'model': tracker.get('model_number', 'Unknown'),
-                'capabilities': tracker.get('capabilities', []),
-                'hardware_id': tracker.get('hw_id', 'Unknown'),
-                'charging': tracker.get('charging', False)
-            }
+            if not force_refresh:
+                cached = self._hw_cache.get(tracker_id)
+                if cached and time.monotonic() - cached[0] < _HW_INFO_TTL:
+                    return cached[1]
+                if self._trackers_cache_fresh():
+                    return _format_hardware_info(tracker_id, tracker)
+            
+            return await self._single_flight(
+                ('hw_info', tracker_id),
+                lambda: self._fetch_hardware_info(tracker_id, tracker)
+            )
             
         except Exception as e:
-            logger.error(f"Failed to get hardware info for {tracker_id}: {str(e)}")
-            raise TractiveClientError(f"Failed to get hardware info: {str(e)}")
+            logger.error("Failed to get hardware info for %s: %s", tracker_id, e)
+            raise _client_error("Failed to get hardware info", e)
+    
+    async def _fetch_hardware_info(self, tracker_id: str, tracker: Dict[str, Any]) -> Dict[str, Any]:
+        """Refresh battery/charging from a live hw_info report and cache the result"""
+        client = self._client
+        try:
+            hw_info = await client.tracker(tracker_id).hw_info()
+            if hw_info:
+                tracker = _merge_hw_info(tracker, hw_info)
+        except UnauthorizedError:
+            raise
+        except Exception as e:
+            logger.warning("Failed to get hw_info for %s: %s", tracker_id, e)
+        
+        if self._client is not client:
+            raise TractiveAuthError("Client closed")
+        
+        hardware_info = _format_hardware_info(tracker_id, tracker)
+        self._hw_cache[tracker_id] = (time.monotonic(), hardware_info)
+        
+        return hardware_info
     
     async def get_latest_position(self, tracker_id: str) -> Dict[str, Any]:
         """Get latest position for a tracker"""
-        if not self._client:
-            raise TractiveClientError("Not authenticated")
-            
+        self._ensure_authenticated()
+        
+        return await self._single_flight(
+            ('latest_position', tracker_id),
+            lambda: self._fetch_latest_position(tracker_id)
+        )
+    
+    async def _fetch_latest_position(self, tracker_id: str) -> Dict[str, Any]:
+        """Fetch and format the latest position report of a tracker"""
         try:
             tracker = self._client.tracker(tracker_id)
             pos_data = await tracker.pos_report()
@@ -177,50 +668,88 @@ class TractiveClient:
             }
             
         except Exception as e:
-            logger.error(f"Failed to get position for {tracker_id}: {str(e)}")
-            raise TractiveClientError(f"Failed to get position: {str(e)}")
+            logger.error("Failed to get position for %s: %s", tracker_id, e)
+            raise _client_error("Failed to get position", e)
+    
+    async def _fetch_position_points(self, tracker_id: str, hours: int) -> Iterable[Dict[str, Any]]:
+        """Fetch raw position points for the last hours, limited to _MAX_HISTORY_POINTS
+        
+        Points are returned unvalidated; formatters skip malformed ones.
+        """
+        # Calculate time range
+        to_time = datetime.now()
+        from_time = to_time - timedelta(hours=hours)
+        
+        tracker = self._client.tracker(tracker_id)
+        positions = await tracker.positions(
+            time_from=int(from_time.timestamp()),
+            time_to=int(to_time.timestamp()),
+            fmt="json_segments"
+        )
+        
+        if not positions:
+            return []
+        
+        # json_segments returns a list of segments, each a list of points;
+        # detect the layout once rather than per row
+        if isinstance(positions[0], (list, tuple)):
+            points = chain.from_iterable(positions)
+        else:
+            points = positions
+        
+        # Lazily take only the first points
+        return islice(points, _MAX_HISTORY_POINTS)
     
     async def get_position_history(self, tracker_id: str, hours: int = 2) -> List[Dict[str, Any]]:
         """Get position history for a tracker"""
-        if not self._client:
-            raise TractiveClientError("Not authenticated")
+        self._ensure_authenticated()
             
         try:
-            # Calculate time range
-            to_time = datetime.now()
-            from_time = to_time - timedelta(hours=hours)
+            points = await self._fetch_position_points(tracker_id, hours)
             
-            tracker = self._client.tracker(tracker_id)
-            positions = await tracker.positions(
-                time_from=int(from_time.timestamp()),
-                time_to=int(to_time.timestamp()),
-                fmt="json_segments"
-            )
+            # Format position data
+            return _convert_points(_format_position, points)
             
-            if not positions:
-                return []
+        except Exception as e:
+            logger.error("Failed to get position history for %s: %s", tracker_id, e)
+            raise _client_error("Failed to get position history", e)
+    
+    async def get_position_history_columnar(self, tracker_id: str, hours: int = 2) -> Dict[str, List[Any]]:
+        """Get position history for a tracker as one list per field instead of one dict per point"""
+        self._ensure_authenticated()
             
-            # Format position data
-            formatted_positions = []
-            for pos in positions[:100]:  # Limit to first 100 points
-                formatted_positions.append({
-                    'timestamp': pos.get('time', 'Unknown'),
-                    'latitude': pos.get('latlong', [None, None])[0],
-                    'longitude': pos.get('latlong', [None, None])[1],
-                    'speed': pos.get('speed', 0),
-                    'accuracy': pos.get('pos_uncertainty', 0)
-                })
-            
-            return formatted_positions
+        try:
+            return _position_columns(await self._fetch_position_points(tracker_id, hours))
             
         except Exception as e:
-            logger.error(f"Failed to get position history for {tracker_id}: {str(e)}")
-            raise TractiveClientError(f"Failed to get position history: {str(e)}")
+            logger.error("Failed to get position history for %s: %s", tracker_id, e)
+            raise _client_error("Failed to get position history", e)
+    
+    async def get_latest_positions(self, tracker_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get latest positions for several trackers concurrently"""
+        self._ensure_authenticated()
+        
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        results = await asyncio.gather(
+            *(_bounded(semaphore, partial(self.get_latest_position, tracker_id)) for tracker_id in tracker_ids),
+            return_exceptions=True
+        )
+        return _batch_results(tracker_ids, results)
+    
+    async def get_position_histories(self, tracker_ids: List[str], hours: int = 2) -> Dict[str, Any]:
+        """Get position histories for several trackers concurrently"""
+        self._ensure_authenticated()
+        
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        results = await asyncio.gather(
+            *(_bounded(semaphore, partial(self.get_position_history, tracker_id, hours)) for tracker_id in tracker_ids),
+            return_exceptions=True
+        )
+        return _batch_results(tracker_ids, results)
     
     async def get_geofences(self, tracker_id: str) -> List[Dict[str, Any]]:
         """Get geofences for a tracker"""
-        if not self._client:
-            raise TractiveClientError("Not authenticated")
+        self._ensure_authenticated()
             
         try:
             # This is a placeholder - actual implementation depends on aiotractive API
@@ -228,13 +757,12 @@ class TractiveClient:
             return []
             
         except Exception as e:
-            logger.error(f"Failed to get geofences for {tracker_id}: {str(e)}")
+            logger.error("Failed to get geofences for %s: %s", tracker_id, e)
             return []
     
     async def get_live_tracking_state(self, tracker_id: str) -> Dict[str, Any]:
         """Get live tracking state for a tracker"""
-        if not self._client:
-            raise TractiveClientError("Not authenticated")
+        self._ensure_authenticated()
             
         try:
             # This is a placeholder - actual implementation depends on aiotractive API
@@ -245,13 +773,12 @@ class TractiveClient:
             }
             
         except Exception as e:
-            logger.error(f"Failed to get live tracking state for {tracker_id}: {str(e)}")
+            logger.error("Failed to get live tracking state for %s: %s", tracker_id, e)
             return {'error': str(e)}
     
     async def toggle_live_tracking(self, tracker_id: str, enable: bool) -> Dict[str, Any]:
         """Toggle live tracking for a tracker"""
-        if not self._client:
-            raise TractiveClientError("Not authenticated")
+        self._ensure_authenticated()
             
         try:
             # This is a placeholder - actual implementation depends on aiotractive API
@@ -262,15 +789,37 @@ class TractiveClient:
             }
             
         except Exception as e:
-            logger.error(f"Failed to toggle live tracking for {tracker_id}: {str(e)}")
+            logger.error("Failed to toggle live tracking for %s: %s", tracker_id, e)
             return {'error': str(e)}
     
     async def close(self):
         """Close the client connection"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+        
+        # Stop shared fetches so they cannot write results back onto this client
+        inflight, self._inflight = self._inflight, {}
+        for task in inflight.values():
+            task.cancel()
+        self._persisted_trackers = None
+        
         if self._client:
             try:
                 await self._client.__aexit__(None, None, None)
             except Exception as e:
-                logger.error(f"Error closing client: {str(e)}")
+                logger.error("Error closing client: %s", e)
+            finally:
+                self._client = None
+                self._token_expires_at = None
+                self.invalidate_trackers()
+                self._hw_cache.clear()
+        
+        # aiotractive does not close a session it was handed, so close it here
+        if self._http:
+            try:
+                await self._http.close()
+            except Exception as e:
+                logger.error("Error closing HTTP session: %s", e)
             finally:
-                self._client = None
\ No newline at end of file
+                self._http = None
\ No newline at end of file